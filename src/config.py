@@ -1,20 +1,83 @@
 import os
 import json
+import copy
+import hashlib
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+from env_cache import load_env
+from storage import write_atomic
 
-load_dotenv()
+try:
+    from jsonschema import Draft202012Validator
+except ImportError:
+    Draft202012Validator = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENV = load_env()
+
+@lru_cache(maxsize=8)
+def _read_config_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a config file, memoized on (path, mtime) so re-reads are free"""
+    data = Path(path).read_bytes()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+CONFIG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reddit": {
+            "type": "object",
+            "properties": {
+                "default_limit": {"type": "integer", "minimum": 1},
+                "default_sort": {"enum": ["hot", "new", "top", "rising"]},
+                "user_agent": {"type": "string", "minLength": 1},
+                "cache_ttl_seconds": {"type": "integer", "minimum": 0}
+            }
+        },
+        "summarizer": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "minLength": 1},
+                "include_comments": {"type": "boolean"}
+            }
+        },
+        "storage": {
+            "type": "object",
+            "properties": {
+                "data_directory": {"type": "string", "minLength": 1},
+                "auto_save": {"type": "boolean"},
+                "filename_format": {"type": "string", "minLength": 1}
+            }
+        },
+        "filters": {
+            "type": "object",
+            "properties": {
+                "min_score": {"type": "integer", "minimum": 0},
+                "min_comments": {"type": "integer", "minimum": 0},
+                "max_age_days": {"type": "integer", "minimum": 0},
+                "exclude_nsfw": {"type": "boolean"}
+            }
+        }
+    }
+}
 
 class Config:
     """Configuration management for Reddit Crawler"""
     
     def __init__(self, config_file: str = "config.json"):
         self.config_file = config_file
+        self._last_hash = None
+        self._env = dict(ENV)
         self.default_config = {
             "reddit": {
                 "default_limit": 10,
                 "default_sort": "hot",
-                "user_agent": "RedditCrawler/1.0"
+                "user_agent": "RedditCrawler/1.0",
+                "cache_ttl_seconds": 300
             },
             "summarizer": {
                 "model": "gemini-2.5-pro",
@@ -33,30 +96,35 @@ class Config:
             }
         }
         self.config = self.load_config()
-    
+        self._flat = self._flatten(self.config)
+
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from file or create default"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
+                mtime_ns = os.stat(self.config_file).st_mtime_ns
+                config = copy.deepcopy(_read_config_cached(self.config_file, mtime_ns))
                 # Merge with defaults to ensure all keys exist
                 return self._merge_configs(self.default_config, config)
             except Exception as e:
                 print(f"Error loading config file: {e}")
                 print("Using default configuration")
-                return self.default_config.copy()
+                return copy.deepcopy(self.default_config)
         else:
             # Create default config file
             self.save_config(self.default_config)
-            return self.default_config.copy()
+            return copy.deepcopy(self.default_config)
     
     def save_config(self, config: Optional[Dict[str, Any]] = None):
-        """Save configuration to file"""
+        """Save configuration to file, skipping the write when nothing changed"""
         config_to_save = config or self.config
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config_to_save, f, indent=2)
+            payload = json.dumps(config_to_save, indent=2).encode('utf-8')
+            payload_hash = hashlib.blake2b(payload, digest_size=16).digest()
+            if payload_hash == self._last_hash:
+                return
+            write_atomic(self.config_file, payload)
+            self._last_hash = payload_hash
             print(f"Configuration saved to {self.config_file}")
         except Exception as e:
             print(f"Error saving config file: {e}")
@@ -72,15 +140,7 @@ class Config:
         Returns:
             Configuration value
         """
-        keys = key_path.split('.')
-        value = self.config
-        
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
+        return self._flat.get(key_path, default)
     
     def set(self, key_path: str, value: Any):
         """
@@ -101,14 +161,15 @@ class Config:
         
         # Set the value
         config[keys[-1]] = value
+        self._flat = self._flatten(self.config)
         self.save_config()
     
     def get_reddit_config(self) -> Dict[str, Any]:
         """Get Reddit API configuration"""
         return {
-            'client_id': os.getenv('REDDIT_CLIENT_ID'),
-            'client_secret': os.getenv('REDDIT_CLIENT_SECRET'),
-            'user_agent': os.getenv('REDDIT_USER_AGENT', self.get('reddit.user_agent')),
+            'client_id': self._env.get('REDDIT_CLIENT_ID'),
+            'client_secret': self._env.get('REDDIT_CLIENT_SECRET'),
+            'user_agent': self._env.get('REDDIT_USER_AGENT', self.get('reddit.user_agent')),
             'default_limit': self.get('reddit.default_limit'),
             'default_sort': self.get('reddit.default_sort')
         }
@@ -116,7 +177,7 @@ class Config:
     def get_gemini_config(self) -> Dict[str, Any]:
         """Get Gemini API configuration"""
         return {
-            'api_key': os.getenv('GEMINI_API_KEY'),
+            'api_key': self._env.get('GEMINI_API_KEY'),
             'model': self.get('summarizer.model')
         }
     
@@ -137,6 +198,36 @@ class Config:
             'exclude_nsfw': self.get('filters.exclude_nsfw')
         }
     
+    def refresh_env(self):
+        """Re-snapshot the process environment (for long-running processes)"""
+        self._env = dict(os.environ)
+
+    def check_value(self, key_path: str, value: Any) -> Optional[str]:
+        """
+        Check a prospective config value against the schema before setting it
+
+        Args:
+            key_path: Dot-separated path to config value
+            value: Candidate value
+
+        Returns:
+            Error message for that path, or None if the value is valid
+        """
+        if Draft202012Validator is None:
+            return None
+
+        candidate = copy.deepcopy(self.config)
+        keys = key_path.split('.')
+        node = candidate
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+
+        for error in Draft202012Validator(CONFIG_SCHEMA).iter_errors(candidate):
+            if ".".join(map(str, error.path)) == key_path:
+                return error.message
+        return None
+
     def validate_config(self) -> Dict[str, str]:
         """
         Validate configuration and return any issues
@@ -145,40 +236,68 @@ class Config:
             Dictionary with validation errors (empty if all valid)
         """
         errors = {}
-        
+
+        # Schema check: collect every violation, not just the first
+        if Draft202012Validator is not None:
+            for error in Draft202012Validator(CONFIG_SCHEMA).iter_errors(self.config):
+                errors["/" + "/".join(map(str, error.path))] = error.message
+        else:
+            # Minimal fallback when jsonschema is not installed
+            if not isinstance(self.get('reddit.default_limit'), int) or self.get('reddit.default_limit') <= 0:
+                errors['reddit_limit'] = "Reddit default limit must be a positive integer"
+
         # Check required environment variables
         reddit_config = self.get_reddit_config()
         if not reddit_config['client_id']:
             errors['reddit_client_id'] = "REDDIT_CLIENT_ID environment variable is required"
         if not reddit_config['client_secret']:
             errors['reddit_client_secret'] = "REDDIT_CLIENT_SECRET environment variable is required"
-        
+
         gemini_config = self.get_gemini_config()
         if not gemini_config['api_key']:
             errors['gemini_api_key'] = "GEMINI_API_KEY environment variable is required for summarization"
-        
-        # Check numeric values
-        if not isinstance(self.get('reddit.default_limit'), int) or self.get('reddit.default_limit') <= 0:
-            errors['reddit_limit'] = "Reddit default limit must be a positive integer"
-        
-        
+
         return errors
     
     def _merge_configs(self, default: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively merge user config with default config"""
-        merged = default.copy()
-        
-        for key, value in user.items():
-            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-                merged[key] = self._merge_configs(merged[key], value)
-            else:
-                merged[key] = value
-        
+        """Merge user config over default config using an iterative work stack"""
+        merged = copy.deepcopy(default)
+        stack = [(merged, user)]
+
+        while stack:
+            dst, src = stack.pop()
+            for key, value in src.items():
+                if isinstance(value, dict) and isinstance(dst.get(key), dict):
+                    stack.append((dst[key], value))
+                else:
+                    dst[key] = value
+
         return merged
-    
+
+    def _flatten(self, config: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """
+        Flatten a nested config dict into {'a.b.c': leaf} form
+
+        Args:
+            config: Nested configuration dictionary
+            prefix: Dotted prefix for recursion
+
+        Returns:
+            Flat dictionary mapping dotted paths to leaf values
+        """
+        flat = {}
+        for key, value in config.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat.update(self._flatten(value, f"{path}."))
+            else:
+                flat[path] = value
+        return flat
+
     def reset_to_defaults(self):
         """Reset configuration to defaults"""
-        self.config = self.default_config.copy()
+        self.config = copy.deepcopy(self.default_config)
+        self._flat = self._flatten(self.config)
         self.save_config()
         print("Configuration reset to defaults")
     
@@ -0,0 +1,16 @@
+import os
+import types
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=1)
+def load_env() -> types.MappingProxyType:
+    """
+    Load .env exactly once per process and return a read-only snapshot
+    of the environment.
+
+    Returns:
+        Read-only mapping of environment variables
+    """
+    load_dotenv()
+    return types.MappingProxyType(dict(os.environ))
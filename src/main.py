@@ -1,24 +1,56 @@
 #!/usr/bin/env python3
 
 import click
+import re
 from typing import List, Dict
 from datetime import datetime, timedelta
 import time
 
-from reddit_client import RedditClient
-from summarizer import PostSummarizer
 from storage import DataStorage
 from config import Config
 
+# RedditClient (praw) and PostSummarizer (Gemini SDK) are imported lazily
+# inside the commands that need them, so e.g. `list-files` and `config`
+# don't pay their import cost.
+
+# Characters stripped from search queries when building filenames
+_FILENAME_STRIP = re.compile(r'[^\w \-]')
+
+def _coerce(value: str):
+    """Convert a CLI string to bool/None/int/float where possible"""
+    low = value.lower()
+    if low in ('true', 'false', 'null'):
+        return {'true': True, 'false': False, 'null': None}[low]
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return value
+
 @click.group()
 @click.version_option(version='1.0.0')
 @click.pass_context
 def cli(ctx):
     """Reddit Crawler - Fetch and summarize Reddit posts"""
     ctx.ensure_object(dict)
-    ctx.obj['config'] = Config()
-    ctx.obj['reddit'] = RedditClient()
-    ctx.obj['summarizer'] = PostSummarizer()
+    config = Config()
+    ctx.obj['config'] = config
+    # One timestamp per invocation so paired files (posts + digest) match
+    ctx.obj['run_timestamp'] = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Fail fast on missing Reddit credentials before any API client is built
+    if ctx.invoked_subcommand in ('fetch', 'search'):
+        errors = config.validate_config()
+        missing = [e for k, e in errors.items() if k.startswith('reddit_client')]
+        if missing:
+            for error in missing:
+                click.echo(f"Error: {error}", err=True)
+            ctx.exit(2)
+
     ctx.obj['storage'] = DataStorage()
 
 @cli.command()
@@ -28,16 +60,19 @@ def cli(ctx):
 @click.option('--summarize/--no-summarize', default=True, help='Generate summaries')
 @click.option('--save/--no-save', default=True, help='Save results to file')
 @click.option('--comments/--no-comments', default=False, help='Include comments in summary')
+@click.option('--cache/--no-cache', default=True, help='Reuse recently cached listings')
 @click.pass_context
-def fetch(ctx, subreddit: str, limit: int, sort: str, summarize: bool, save: bool, comments: bool):
+def fetch(ctx, subreddit: str, limit: int, sort: str, summarize: bool, save: bool, comments: bool, cache: bool):
     """Fetch posts from a subreddit"""
-    reddit = ctx.obj['reddit']
-    summarizer = ctx.obj['summarizer']
+    from reddit_client import RedditClient
+
+    config = ctx.obj['config']
+    reddit = RedditClient(cache_ttl=config.get('reddit.cache_ttl_seconds', 300))
     storage = ctx.obj['storage']
-    
+
     click.echo(f"Fetching {limit} {sort} posts from r/{subreddit}...")
-    
-    posts = reddit.get_posts_from_subreddit(subreddit, limit, sort)
+
+    posts = reddit.get_posts_from_subreddit(subreddit, limit, sort, use_cache=cache)
     
     if not posts:
         click.echo("No posts found.")
@@ -46,20 +81,24 @@ def fetch(ctx, subreddit: str, limit: int, sort: str, summarize: bool, save: boo
     click.echo(f"Found {len(posts)} posts.")
     
     if summarize:
+        from summarizer import PostSummarizer
+
         click.echo("Generating summaries...")
-        posts = summarizer.summarize_multiple_posts(posts, comments)
-    
+        posts = PostSummarizer().summarize_multiple_posts(posts, comments)
+
     if save:
-        filename = f"{subreddit}_{sort}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        storage.save_posts(posts, filename)
+        filename = f"{subreddit}_{sort}_{ctx.obj['run_timestamp']}.jsonl"
+        storage.save_posts_ndjson(posts, filename)
     
-    # Display results
+    # Display results in a single write
+    lines = []
     for i, post in enumerate(posts, 1):
-        click.echo(f"\n{i}. {post['title']}")
-        click.echo(f"   Score: {post['score']} | Comments: {post['num_comments']}")
+        lines.append(f"\n{i}. {post['title']}")
+        lines.append(f"   Score: {post['score']} | Comments: {post['num_comments']}")
         if 'summary' in post:
-            click.echo(f"   Summary: {post['summary']}")
-        click.echo(f"   URL: {post['permalink']}")
+            lines.append(f"   Summary: {post['summary']}")
+        lines.append(f"   URL: {post['permalink']}")
+    click.echo('\n'.join(lines))
 
 @cli.command()
 @click.argument('query')
@@ -70,10 +109,11 @@ def fetch(ctx, subreddit: str, limit: int, sort: str, summarize: bool, save: boo
 @click.pass_context
 def search(ctx, query: str, subreddit: str, limit: int, summarize: bool, save: bool):
     """Search for posts"""
-    reddit = ctx.obj['reddit']
-    summarizer = ctx.obj['summarizer']
+    from reddit_client import RedditClient
+
+    reddit = RedditClient()
     storage = ctx.obj['storage']
-    
+
     search_location = f"r/{subreddit}" if subreddit else "all of Reddit"
     click.echo(f"Searching for '{query}' in {search_location}...")
     
@@ -86,22 +126,26 @@ def search(ctx, query: str, subreddit: str, limit: int, summarize: bool, save: b
     click.echo(f"Found {len(posts)} posts.")
     
     if summarize:
+        from summarizer import PostSummarizer
+
         click.echo("Generating summaries...")
-        posts = summarizer.summarize_multiple_posts(posts)
-    
+        posts = PostSummarizer().summarize_multiple_posts(posts)
+
     if save:
-        safe_query = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        filename = f"search_{safe_query}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        storage.save_posts(posts, filename)
+        safe_query = _FILENAME_STRIP.sub('', query).rstrip()
+        filename = f"search_{safe_query}_{ctx.obj['run_timestamp']}.jsonl"
+        storage.save_posts_ndjson(posts, filename)
     
-    # Display results
+    # Display results in a single write
+    lines = []
     for i, post in enumerate(posts, 1):
-        click.echo(f"\n{i}. {post['title']}")
-        click.echo(f"   Subreddit: r/{post['subreddit']}")
-        click.echo(f"   Score: {post['score']} | Comments: {post['num_comments']}")
+        lines.append(f"\n{i}. {post['title']}")
+        lines.append(f"   Subreddit: r/{post['subreddit']}")
+        lines.append(f"   Score: {post['score']} | Comments: {post['num_comments']}")
         if 'summary' in post:
-            click.echo(f"   Summary: {post['summary']}")
-        click.echo(f"   URL: {post['permalink']}")
+            lines.append(f"   Summary: {post['summary']}")
+        lines.append(f"   URL: {post['permalink']}")
+    click.echo('\n'.join(lines))
 
 @cli.command()
 @click.argument('filename')
@@ -110,19 +154,21 @@ def search(ctx, query: str, subreddit: str, limit: int, summarize: bool, save: b
 def digest(ctx, filename: str, create_digest: bool):
     """Create digest from saved posts"""
     storage = ctx.obj['storage']
-    summarizer = ctx.obj['summarizer']
-    
+
     posts = storage.load_posts(filename)
-    
+
     if not posts:
         click.echo("No posts found in file.")
         return
-    
+
     if create_digest:
+        from summarizer import PostSummarizer
+
         click.echo("Creating digest...")
-        digest_content = summarizer.create_digest(posts)
+        digest_content = PostSummarizer().create_digest(posts)
         
-        digest_filename = filename.replace('.json', '_digest.md')
+        stem = filename.rsplit('.', 1)[0]
+        digest_filename = f"{stem}_digest.md"
         storage.save_digest(digest_content, digest_filename)
         
         click.echo(f"Digest created: {digest_filename}")
@@ -199,15 +245,14 @@ def set_config(ctx, key: str, value: str):
         return
     
     config = ctx.obj['config']
-    
-    # Try to convert value to appropriate type
-    if value.lower() in ('true', 'false'):
-        value = value.lower() == 'true'
-    elif value.isdigit():
-        value = int(value)
-    elif value.replace('.', '').isdigit():
-        value = float(value)
-    
+
+    value = _coerce(value)
+
+    error = config.check_value(key, value)
+    if error:
+        click.echo(f"Invalid value for {key}: {error}")
+        return
+
     config.set(key, value)
     click.echo(f"Set {key} = {value}")
 
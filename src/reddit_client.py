@@ -1,33 +1,115 @@
 import praw
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
-from typing import List, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
+from env_cache import load_env
 
-load_dotenv()
+ENV = load_env()
 
 class RedditClient:
-    def __init__(self):
+    def __init__(self, cache_ttl: int = 300, cache_dir: str = os.path.join('data', '.http_cache')):
         self.reddit = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT', 'RedditCrawler/1.0 by /u/ZorbaHan')
+            client_id=ENV.get('REDDIT_CLIENT_ID'),
+            client_secret=ENV.get('REDDIT_CLIENT_SECRET'),
+            user_agent=ENV.get('REDDIT_USER_AGENT', 'RedditCrawler/1.0 by /u/ZorbaHan'),
+            ratelimit_seconds=300
         )
-    
-    def get_posts_from_subreddit(self, subreddit_name: str, limit: int = 10, sort_by: str = 'hot') -> List[Dict]:
+        self._pool = ThreadPoolExecutor(
+            max_workers=int(ENV.get('REDDIT_CRAWLER_WORKERS', '6'))
+        )
+        self.cache_ttl = cache_ttl
+        self.cache_dir = cache_dir
+
+    def _cache_path(self, subreddit_name: str, sort_by: str, limit: int) -> str:
+        """Cache file path for a (subreddit, sort, limit) listing"""
+        key = f"{subreddit_name}|{sort_by}|{limit}"
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_cache(self, path: str) -> Optional[List[Dict]]:
+        """Return cached posts if the entry is newer than the TTL, else None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry['cached_at'] <= self.cache_ttl:
+                return entry['posts']
+        except Exception:
+            pass
+        return None
+
+    def _write_cache(self, path: str, posts: List[Dict]):
+        """Store a listing in the cache, ignoring failures"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'cached_at': time.time(), 'posts': posts}, f)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _post_to_dict(post, subreddit_name: str) -> Dict:
+        """Convert a PRAW submission into the post dict used throughout the app"""
+        return {
+            'id': post.id,
+            'title': post.title,
+            'content': post.selftext,
+            'url': post.url,
+            'score': post.score,
+            'upvote_ratio': post.upvote_ratio,
+            'num_comments': post.num_comments,
+            'created_utc': post.created_utc,
+            'author': str(post.author) if post.author else '[deleted]',
+            'permalink': f"https://reddit.com{post.permalink}",
+            'subreddit': subreddit_name
+        }
+
+    def get_posts_from_subreddit(self, subreddit_name: str, limit: int = 10,
+                                 sort_by: str = 'hot', use_cache: bool = True) -> List[Dict]:
         """
         Fetch posts from a specific subreddit
-        
+
         Args:
             subreddit_name: Name of the subreddit
             limit: Number of posts to fetch
             sort_by: Sort method ('hot', 'new', 'top', 'rising')
-        
+            use_cache: Serve a recent cached listing instead of re-downloading
+
         Returns:
             List of post dictionaries
         """
+        cache_path = self._cache_path(subreddit_name, sort_by, limit)
+        if use_cache:
+            cached = self._read_cache(cache_path)
+            if cached is not None:
+                return cached
+
+        post_list = list(self.iter_posts_from_subreddit(subreddit_name, limit, sort_by))
+        if post_list:
+            self._write_cache(cache_path, post_list)
+        return post_list
+
+    def iter_posts_from_subreddit(self, subreddit_name: str, limit: int = 10,
+                                  sort_by: str = 'hot') -> Iterator[Dict]:
+        """
+        Yield posts from a subreddit one at a time as PRAW streams them
+
+        Lets callers summarize/serialize posts without holding the whole
+        listing in memory. Bypasses the listing cache.
+
+        Args:
+            subreddit_name: Name of the subreddit
+            limit: Number of posts to fetch
+            sort_by: Sort method ('hot', 'new', 'top', 'rising')
+
+        Yields:
+            Post dictionaries
+        """
         try:
             subreddit = self.reddit.subreddit(subreddit_name)
-            
+
             if sort_by == 'hot':
                 posts = subreddit.hot(limit=limit)
             elif sort_by == 'new':
@@ -38,29 +120,13 @@ class RedditClient:
                 posts = subreddit.rising(limit=limit)
             else:
                 posts = subreddit.hot(limit=limit)
-            
-            post_list = []
+
             for post in posts:
-                post_data = {
-                    'id': post.id,
-                    'title': post.title,
-                    'content': post.selftext,
-                    'url': post.url,
-                    'score': post.score,
-                    'upvote_ratio': post.upvote_ratio,
-                    'num_comments': post.num_comments,
-                    'created_utc': post.created_utc,
-                    'author': str(post.author) if post.author else '[deleted]',
-                    'permalink': f"https://reddit.com{post.permalink}",
-                    'subreddit': subreddit_name
-                }
-                post_list.append(post_data)
-            
-            return post_list
-            
+                yield self._post_to_dict(post, subreddit_name)
+
         except Exception as e:
             print(f"Error fetching posts from r/{subreddit_name}: {e}")
-            return []
+            return
     
     def search_posts(self, query: str, subreddit_name: Optional[str] = None, limit: int = 10) -> List[Dict]:
         """
@@ -74,36 +140,58 @@ class RedditClient:
         Returns:
             List of post dictionaries
         """
+        return list(self.iter_search_posts(query, subreddit_name, limit))
+
+    def iter_search_posts(self, query: str, subreddit_name: Optional[str] = None,
+                          limit: int = 10) -> Iterator[Dict]:
+        """
+        Yield search results one at a time as PRAW streams them
+
+        Args:
+            query: Search query
+            subreddit_name: Optional subreddit to search within
+            limit: Number of posts to fetch
+
+        Yields:
+            Post dictionaries
+        """
         try:
             if subreddit_name:
                 subreddit = self.reddit.subreddit(subreddit_name)
                 posts = subreddit.search(query, limit=limit)
             else:
                 posts = self.reddit.subreddit('all').search(query, limit=limit)
-            
-            post_list = []
+
             for post in posts:
-                post_data = {
-                    'id': post.id,
-                    'title': post.title,
-                    'content': post.selftext,
-                    'url': post.url,
-                    'score': post.score,
-                    'upvote_ratio': post.upvote_ratio,
-                    'num_comments': post.num_comments,
-                    'created_utc': post.created_utc,
-                    'author': str(post.author) if post.author else '[deleted]',
-                    'permalink': f"https://reddit.com{post.permalink}",
-                    'subreddit': post.subreddit.display_name
-                }
-                post_list.append(post_data)
-            
-            return post_list
-            
+                yield self._post_to_dict(post, post.subreddit.display_name)
+
         except Exception as e:
             print(f"Error searching posts: {e}")
-            return []
+            return
     
+    def get_posts_with_comments(self, subreddit_name: str, limit: int = 10,
+                                sort_by: str = 'hot', top_comments: int = 10) -> List[Tuple[Dict, List[Dict]]]:
+        """
+        Fetch posts and their top comments, fetching comments concurrently
+
+        Comment fetching is I/O-bound, so the per-post round-trips are
+        overlapped on the client's thread pool (PRAW handles rate limiting).
+
+        Args:
+            subreddit_name: Name of the subreddit
+            limit: Number of posts to fetch
+            sort_by: Sort method ('hot', 'new', 'top', 'rising')
+            top_comments: Number of top comments to fetch per post
+
+        Returns:
+            List of (post, comments) tuples
+        """
+        posts = self.get_posts_from_subreddit(subreddit_name, limit, sort_by)
+        comments = self._pool.map(
+            lambda post: self.get_post_comments(post['id'], top_comments), posts
+        )
+        return list(zip(posts, comments))
+
     def get_post_comments(self, post_id: str, limit: int = 10) -> List[Dict]:
         """
         Get comments for a specific post
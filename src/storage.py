@@ -1,11 +1,48 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def write_atomic(path: str, data: bytes):
+    """
+    Write bytes to a file atomically
+
+    Writes to a temporary sibling file, fsyncs, then os.replace()s it
+    over the target so readers never observe a torn write.
+
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 class DataStorage:
+    INDEX_FILENAME = ".index.json"
+
     def __init__(self, data_dir: str = "data"):
         self.data_dir = data_dir
+        self.index_path = os.path.join(data_dir, self.INDEX_FILENAME)
+        self._dir_stats = {}
         self.ensure_data_directory()
     
     def ensure_data_directory(self):
@@ -31,9 +68,18 @@ class DataStorage:
         filepath = os.path.join(self.data_dir, filename)
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, indent=2, ensure_ascii=False)
-            
+            if orjson is not None:
+                payload = orjson.dumps(posts, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(posts, indent=2, ensure_ascii=False).encode('utf-8')
+            write_atomic(filepath, payload)
+
+            self._update_index(filename, {
+                "post_count": len(posts),
+                "subreddits": sorted(set(post.get('subreddit', '') for post in posts)),
+                "mtime": os.stat(filepath).st_mtime
+            })
+
             print(f"Saved {len(posts)} posts to {filepath}")
             return filepath
             
@@ -41,6 +87,52 @@ class DataStorage:
             print(f"Error saving posts: {e}")
             return ""
     
+    def save_posts_ndjson(self, posts, filename: Optional[str] = None) -> str:
+        """
+        Save posts as newline-delimited JSON (one post per line)
+
+        Streams one line per post, so memory stays constant regardless of
+        how many posts are written, and the resulting .jsonl file can be
+        appended to by incremental crawls.
+
+        Args:
+            posts: Iterable of post dictionaries
+            filename: Optional custom filename (should end in .jsonl)
+
+        Returns:
+            Path to saved file
+        """
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"reddit_posts_{timestamp}.jsonl"
+
+        filepath = os.path.join(self.data_dir, filename)
+
+        try:
+            count = 0
+            subreddits = set()
+            with open(filepath, 'wb') as f:
+                for post in posts:
+                    if orjson is not None:
+                        f.write(orjson.dumps(post) + b'\n')
+                    else:
+                        f.write(json.dumps(post, ensure_ascii=False).encode('utf-8') + b'\n')
+                    count += 1
+                    subreddits.add(post.get('subreddit', ''))
+
+            self._update_index(filename, {
+                "post_count": count,
+                "subreddits": sorted(subreddits),
+                "mtime": os.stat(filepath).st_mtime
+            })
+
+            print(f"Saved {count} posts to {filepath}")
+            return filepath
+
+        except Exception as e:
+            print(f"Error saving posts: {e}")
+            return ""
+
     def load_posts(self, filename: str) -> List[Dict]:
         """
         Load posts from JSON file
@@ -54,9 +146,17 @@ class DataStorage:
         filepath = os.path.join(self.data_dir, filename)
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                posts = json.load(f)
-            
+            loads = orjson.loads if orjson is not None else json.loads
+            if filename.endswith('.jsonl'):
+                with open(filepath, 'rb') as f:
+                    posts = [loads(line) for line in f if line.strip()]
+            elif orjson is not None:
+                with open(filepath, 'rb') as f:
+                    posts = orjson.loads(f.read())
+            else:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    posts = json.load(f)
+
             print(f"Loaded {len(posts)} posts from {filepath}")
             return posts
             
@@ -101,11 +201,17 @@ class DataStorage:
         """
         if not os.path.exists(self.data_dir):
             return {"json": [], "md": []}
-        
-        files = os.listdir(self.data_dir)
-        json_files = [f for f in files if f.endswith('.json')]
+
+        self._dir_stats = {}
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name != self.INDEX_FILENAME:
+                    self._dir_stats[entry.name] = entry.stat()
+
+        files = self._dir_stats
+        json_files = [f for f in files if f.endswith(('.json', '.jsonl'))]
         md_files = [f for f in files if f.endswith('.md')]
-        
+
         return {
             "json": sorted(json_files, reverse=True),
             "md": sorted(md_files, reverse=True)
@@ -136,43 +242,110 @@ class DataStorage:
             print(f"Error deleting file {filepath}: {e}")
             return False
     
-    def get_file_info(self, filename: str) -> Optional[Dict]:
+    def get_file_info(self, filename: str, stat: Optional[os.stat_result] = None) -> Optional[Dict]:
         """
         Get information about a saved file
-        
+
         Args:
             filename: Name of the file
-        
+            stat: Optional pre-fetched stat result (e.g. from list_saved_files)
+
         Returns:
             Dictionary with file information or None if file doesn't exist
         """
         filepath = os.path.join(self.data_dir, filename)
-        
+
         try:
-            if os.path.exists(filepath):
+            if stat is None:
+                stat = self._dir_stats.get(filename)
+            if stat is None and os.path.exists(filepath):
                 stat = os.stat(filepath)
-                
+            if stat is not None:
                 info = {
                     "filename": filename,
                     "filepath": filepath,
                     "size_bytes": stat.st_size,
                     "size_mb": round(stat.st_size / (1024 * 1024), 2),
-                    "created": datetime.fromtimestamp(stat.st_ctime).strftime("%Y-%m-%d %H:%M:%S"),
-                    "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat(sep=' ', timespec='seconds'),
+                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(sep=' ', timespec='seconds')
                 }
                 
-                # Add content-specific info for JSON files
-                if filename.endswith('.json'):
-                    posts = self.load_posts(filename)
-                    info["post_count"] = len(posts)
-                    if posts:
-                        subreddits = set(post.get('subreddit', '') for post in posts)
-                        info["subreddits"] = list(subreddits)
-                
+                # Add content-specific info for post files
+                if filename.endswith(('.json', '.jsonl')):
+                    indexed = self._load_index().get(filename)
+                    if indexed and indexed.get('mtime') == stat.st_mtime:
+                        info["post_count"] = indexed["post_count"]
+                        if indexed.get("subreddits"):
+                            info["subreddits"] = indexed["subreddits"]
+                    elif filename.endswith('.jsonl'):
+                        # One post per line: counting newlines is enough
+                        info["post_count"] = self._count_lines(filepath)
+                    else:
+                        count, subreddits = self._scan_json_metadata(filepath)
+                        info["post_count"] = count
+                        if subreddits:
+                            info["subreddits"] = sorted(subreddits)
+
                 return info
             else:
                 return None
-                
+
         except Exception as e:
             print(f"Error getting file info for {filename}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def _count_lines(filepath: str) -> int:
+        """Count non-empty lines by scanning fixed-size binary chunks"""
+        count = 0
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                count += chunk.count(b'\n')
+        return count
+
+    def _scan_json_metadata(self, filepath: str) -> Tuple[int, Set[str]]:
+        """
+        Count posts and collect unique subreddits without materializing the file
+
+        Streams the JSON array with ijson so memory stays O(unique subreddits)
+        instead of O(file size); falls back to a full json.load when ijson
+        is not installed.
+
+        Args:
+            filepath: Path to the JSON posts file
+
+        Returns:
+            Tuple of (post count, set of subreddit names)
+        """
+        if ijson is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                posts = json.load(f)
+            return len(posts), set(post.get('subreddit', '') for post in posts)
+
+        count = 0
+        subreddits = set()
+        with open(filepath, 'rb') as f:
+            for prefix, event, value in ijson.parse(f):
+                if prefix == 'item' and event == 'start_map':
+                    count += 1
+                elif prefix == 'item.subreddit' and event == 'string':
+                    subreddits.add(value)
+        return count, subreddits
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load the sidecar metadata index, returning {} if missing or unreadable"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _update_index(self, filename: str, entry: Dict):
+        """Record metadata for a saved file in the sidecar index"""
+        index = self._load_index()
+        index[filename] = entry
+        try:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=2)
+        except Exception as e:
+            print(f"Error updating index: {e}")
\ No newline at end of file
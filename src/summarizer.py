@@ -1,16 +1,412 @@
-import google.generativeai as genai
+import asyncio
+import hashlib
+import io
+import json
+import logging
 import os
-from dotenv import load_dotenv
-from typing import List, Dict, Optional
+import random
+import re
+import time
+from datetime import datetime
+import google.generativeai as genai
+from typing import IO, FrozenSet, List, Dict, Optional, Tuple, Union
+from env_cache import load_env
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    RETRYABLE_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = ()
+
+ENV = load_env()
+
+# Module logger instead of print: log records are cheap to drop (disabled
+# below WARNING unless the app configures logging) and handler I/O never
+# runs inside the summarization hot loop or the async fan-out
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'models/gemini-2.5-flash'
+
+# Near-duplicate posts (crossposts, reposts, mirrored news) above this
+# Jaccard similarity reuse each other's cached summary
+SIMILARITY_THRESHOLD = 0.9
+
+# Posts with less body text than this have nothing for an LLM summary to
+# compress: the title already is the summary
+TRIVIAL_CONTENT_CHARS = 150
+
+# Digests whose source material is shorter than this are assembled
+# directly instead of asking Gemini for an overall summary
+TRIVIAL_DIGEST_CHARS = 2000
+
+# Pack batched chunks up to ~80% of the model's 1M-token context window,
+# estimated locally so no count_tokens round-trip is needed
+CHUNK_TOKEN_BUDGET = 800_000
+
+# Estimated token cost of the batched prompt's instruction scaffolding
+CHUNK_PROMPT_OVERHEAD = 100
 
-load_dotenv()
+_TOKEN_RE = re.compile(r'\w+')
+
+# Cleanup passes applied before content reaches the model, compiled once
+# at import. Deliberately simple patterns with bounded backtracking: bare
+# URLs add tokens the model can't use, and markdown emphasis markers
+# survive Reddit's API as literal asterisks/underscores.
+_URL_RE = re.compile(r'https?://\S+')
+_MD_EMPHASIS_RE = re.compile(r'(\*\*|__|\*|_)(?=\S)(.+?)(?<=\S)\1')
+_WS_RE = re.compile(r'[ \t]{2,}')
+
+def _clean_text(text: str) -> str:
+    """Strip bare URLs and markdown emphasis, collapse runs of spaces"""
+    text = _URL_RE.sub('', text)
+    text = _MD_EMPHASIS_RE.sub(r'\2', text)
+    return _WS_RE.sub(' ', text).strip()
+
+# Shared lazily-built model so every PostSummarizer reuses one configured
+# client (and its transport channel) instead of re-doing TLS/DNS setup
+_MODEL: Optional[genai.GenerativeModel] = None
+
+def _get_model() -> genai.GenerativeModel:
+    global _MODEL
+    if _MODEL is None:
+        # grpc multiplexes concurrent RPCs over one HTTP/2 channel, which
+        # the async fan-out relies on
+        genai.configure(api_key=ENV.get('GEMINI_API_KEY'), transport='grpc')
+        _MODEL = genai.GenerativeModel(MODEL_NAME)
+    return _MODEL
+
+# Model backed by the server-side cached prompt prefix, so each post call
+# only sends/tokenizes the varying content. False means caching is
+# unavailable (e.g. prefix below the API's minimum cacheable size).
+_CACHED_MODEL = None
+
+def _get_cached_post_model() -> Optional[genai.GenerativeModel]:
+    global _CACHED_MODEL
+    if _CACHED_MODEL is None:
+        _get_model()  # ensure genai is configured
+        try:
+            from datetime import timedelta
+            cached = genai.caching.CachedContent.create(
+                model=MODEL_NAME,
+                system_instruction=PostSummarizer._POST_PROMPT_PREFIX,
+                ttl=timedelta(hours=1),
+            )
+            _CACHED_MODEL = genai.GenerativeModel.from_cached_content(cached)
+        except Exception:
+            _CACHED_MODEL = False
+    return _CACHED_MODEL or None
 
 class PostSummarizer:
+    # Constant prompt scaffolding, built once so per-call work is a single
+    # format() and cache keys stay independent of prompt assembly. The
+    # prefix is also what gets uploaded for server-side context caching.
+    _POST_PROMPT_PREFIX = (
+        "You are a helpful assistant that summarizes Reddit posts concisely and accurately.\n"
+        "\n"
+        "Please provide a concise summary of this Reddit post. Include:\n"
+        "1. Main topic/subject\n"
+        "2. Key points discussed\n"
+        "3. Overall sentiment/tone\n"
+        "4. Any important details or conclusions"
+    )
+
+    _POST_CONTENT_TMPL = (
+        "Post content:\n"
+        "{content}\n"
+        "\n"
+        "Provide a summary in 2-3 sentences."
+    )
+
+    _DIGEST_PROMPT_TMPL = (
+        "You are a helpful assistant that creates insightful summaries of Reddit discussions.\n"
+        "\n"
+        "Based on these Reddit posts, provide an overall summary highlighting:\n"
+        "1. Main themes or topics discussed\n"
+        "2. Notable trends or patterns\n"
+        "3. Most engaging or controversial posts\n"
+        "4. Key insights or takeaways\n"
+        "\n"
+        "Posts data:\n"
+        "{digest}\n"
+        "\n"
+        "Provide a comprehensive but concise summary in 3-4 paragraphs."
+    )
+
     def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
+        self.model = _get_model()
+        self.cache_dir = ENV.get('SUMMARY_CACHE_DIR', '.summary_cache')
+        self.cache_ttl = 7 * 86400
+        self._sem_index: Optional[List[Tuple[FrozenSet[str], str]]] = None
+        # Warm the similarity index now: scanning the cache directory on
+        # the first post would make that post's latency an outlier
+        self._load_semantic_index()
+
+    def _cache_key(self, content: str) -> str:
+        """Cache key for a post's summarization content"""
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Return a cached summary if present, unexpired and for the same model"""
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('model') == MODEL_NAME and time.time() <= entry['expires']:
+                return entry['summary']
+        except Exception:
+            pass
+        return None
+
+    def _cache_set(self, key: str, summary: str, tokens: Optional[FrozenSet[str]] = None):
+        """Store a summary in the cache, ignoring failures"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry = {'summary': summary, 'model': MODEL_NAME,
+                     'expires': time.time() + self.cache_ttl}
+            if tokens:
+                entry['tokens'] = sorted(tokens)
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _tokenize(content: str) -> FrozenSet[str]:
+        """Normalize content into the token set used for similarity lookups"""
+        return frozenset(_TOKEN_RE.findall(content.lower()))
+
+    def _load_semantic_index(self) -> List[Tuple[FrozenSet[str], str]]:
+        """Build the in-memory similarity index from unexpired cache entries"""
+        if self._sem_index is None:
+            index = []
+            try:
+                now = time.time()
+                with os.scandir(self.cache_dir) as entries:
+                    for file_entry in entries:
+                        if not file_entry.name.endswith('.json'):
+                            continue
+                        try:
+                            with open(file_entry.path, 'r', encoding='utf-8') as f:
+                                entry = json.load(f)
+                            if (entry.get('model') == MODEL_NAME
+                                    and entry.get('tokens')
+                                    and now <= entry['expires']):
+                                index.append((frozenset(entry['tokens']), entry['summary']))
+                        except Exception:
+                            continue
+            except OSError:
+                pass
+            self._sem_index = index
+        return self._sem_index
+
+    def _similar_cached_summary(self, tokens: FrozenSet[str]) -> Optional[str]:
+        """
+        Return the summary of the most similar cached post, if close enough
+
+        Compares token-set Jaccard similarity against cached entries; a hit
+        means a near-duplicate post (crosspost/repost) was already summarized.
+        """
+        if not tokens:
+            return None
+        best_score = 0.0
+        best_summary = None
+        for cached_tokens, summary in self._load_semantic_index():
+            union = len(tokens | cached_tokens)
+            if union == 0:
+                continue
+            score = len(tokens & cached_tokens) / union
+            if score > best_score:
+                best_score = score
+                best_summary = summary
+        if best_score >= SIMILARITY_THRESHOLD:
+            return best_summary
+        return None
     
-    def summarize_post(self, post: Dict, include_comments: bool = False, comments: List[Dict] = None) -> Dict:
+    @staticmethod
+    def _comment_prefixes(comments: List[Dict], limit: int = 5) -> List[str]:
+        """
+        Unique comment prefixes in original ranking order
+
+        Top comments are often reposted verbatim across daily threads;
+        dropping duplicates keeps them from crowding out distinct ones.
+
+        Args:
+            comments: Comment dictionaries
+            limit: Maximum number of prefixes to keep
+
+        Returns:
+            Up to `limit` deduplicated 200-character comment prefixes
+        """
+        seen = set()
+        prefixes = []
+        for comment in comments:
+            prefix = comment['body'][:200]
+            if prefix in seen:
+                continue
+            seen.add(prefix)
+            prefixes.append(prefix)
+            if len(prefixes) == limit:
+                break
+        return prefixes
+
+    @classmethod
+    def _build_content(cls, post: Dict, include_comments: bool = False,
+                       comments: List[Dict] = None) -> str:
+        """Assemble the cleaned content block sent to the model for one post"""
+        parts = [f"Title: {post['title']}\n"]
+
+        if post['content']:
+            parts.append(f"Content: {_clean_text(post['content'])}\n")
+
+        if include_comments and comments:
+            parts.append("\nTop Comments:\n")
+            for i, prefix in enumerate(cls._comment_prefixes(comments), 1):
+                parts.append(f"{i}. {_clean_text(prefix)}...\n")
+
+        return "".join(parts)
+
+    def _with_summary(self, post: Dict, summary: str, summarized_at: Optional[str] = None) -> Dict:
+        """Return a copy of the post with the summary fields attached"""
+        post_with_summary = post.copy()
+        post_with_summary['summary'] = summary
+        post_with_summary['summarized_at'] = summarized_at or self._get_current_timestamp()
+        return post_with_summary
+
+    def _generate_text(self, prompt: Union[str, List[str]], stream: bool = False, max_attempts: int = 5,
+                       model: Optional[genai.GenerativeModel] = None, **kwargs) -> str:
+        """
+        Call the model and return the response text, retrying transient errors
+
+        Retries 429/5xx/timeout errors with exponential backoff and jitter;
+        terminal errors (bad request, invalid key) propagate immediately so
+        they aren't retried pointlessly.
+
+        Args:
+            prompt: Prompt to send (a string, or a list of content parts)
+            stream: Stream the response and join the chunks
+            max_attempts: Total attempts including the first
+            model: Optional model to use instead of the default
+            **kwargs: Extra arguments for generate_content
+
+        Returns:
+            Response text
+        """
+        model = model or self.model
+        for attempt in range(max_attempts):
+            try:
+                if stream:
+                    chunks = model.generate_content(prompt, stream=True, **kwargs)
+                    return "".join(chunk.text for chunk in chunks)
+                return model.generate_content(prompt, **kwargs).text
+            except RETRYABLE_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    raise
+                delay = min(2 ** attempt + random.uniform(0, 1), 30)
+                logger.warning("Transient Gemini error (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
+
+    def _stream_to(self, prompt: str, sink: IO[str], max_attempts: int = 5,
+                   model: Optional[genai.GenerativeModel] = None, **kwargs):
+        """
+        Stream a response into a text sink as chunks arrive
+
+        Writes each chunk as soon as the model produces it, so the caller's
+        I/O overlaps with generation instead of waiting for the full
+        response. Retries transient errors like _generate_text, but only
+        until the first chunk has been written; after that the error
+        propagates, since partial output is already in the sink. Leading
+        and trailing whitespace are trimmed to match the non-streaming
+        `.strip()` behaviour.
+
+        Args:
+            prompt: Prompt to send
+            sink: Writable text stream receiving the response
+            max_attempts: Total attempts including the first
+            model: Optional model to use instead of the default
+            **kwargs: Extra arguments for generate_content
+        """
+        model = model or self.model
+        for attempt in range(max_attempts):
+            pending = None  # last chunk held back so the tail can be rstripped
+            wrote = False
+            try:
+                for chunk in model.generate_content(prompt, stream=True, **kwargs):
+                    text = chunk.text
+                    if pending is None and not wrote:
+                        text = text.lstrip()
+                        if not text:
+                            continue
+                    if pending is not None:
+                        sink.write(pending)
+                        wrote = True
+                    pending = text
+                if pending:
+                    sink.write(pending.rstrip())
+                return
+            except RETRYABLE_ERRORS as e:
+                if wrote or attempt == max_attempts - 1:
+                    raise
+                delay = min(2 ** attempt + random.uniform(0, 1), 30)
+                logger.warning("Transient Gemini error (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
+
+    def _generate_post_summary(self, content_to_summarize: str) -> str:
+        """
+        Generate a single-post summary, preferring the cached prompt prefix
+
+        With context caching, only the varying post content is sent and
+        tokenized per call. If the cached prefix has expired or caching is
+        unavailable, falls back to the full prompt on the default model.
+
+        Args:
+            content_to_summarize: Content block for the post
+
+        Returns:
+            Summary text
+        """
+        global _CACHED_MODEL
+
+        content_part = self._POST_CONTENT_TMPL.format(content=content_to_summarize)
+
+        cached_model = _get_cached_post_model()
+        if cached_model is not None:
+            try:
+                return self._generate_text(content_part, stream=True, model=cached_model).strip()
+            except Exception:
+                # Cached prefix likely expired; recreate lazily next call
+                _CACHED_MODEL = None
+
+        # Fallback: pass the frozen prefix and the varying content as two
+        # parts, so the prefix is never re-concatenated (and re-encoded as
+        # one big string) per call
+        return self._generate_text([self._POST_PROMPT_PREFIX, content_part], stream=True).strip()
+
+    def _trivial_summary(self, post: Dict, summarized_at: Optional[str] = None) -> Optional[Dict]:
+        """
+        Summarize a trivially short post without calling the model
+
+        Title-only posts (common on r/news, r/AskReddit) gain nothing from
+        an LLM summary that would be longer than the input.
+
+        Args:
+            post: Post dictionary from Reddit API
+            summarized_at: Optional batch timestamp to reuse
+
+        Returns:
+            Summarized post, or None if the post isn't trivial
+        """
+        if len(post.get('content') or '') >= TRIVIAL_CONTENT_CHARS:
+            return None
+        post_with_summary = self._with_summary(post, post['title'], summarized_at)
+        post_with_summary['summary_source'] = 'trivial'
+        return post_with_summary
+
+    def summarize_post(self, post: Dict, include_comments: bool = False, comments: List[Dict] = None,
+                       summarized_at: Optional[str] = None) -> Dict:
         """
         Summarize a single Reddit post
         
@@ -18,141 +414,357 @@ class PostSummarizer:
             post: Post dictionary from Reddit API
             include_comments: Whether to include comments in summary
             comments: List of comments if include_comments is True
-        
+            summarized_at: Optional batch timestamp to reuse instead of now()
+
         Returns:
             Dictionary with original post data plus summary
         """
         try:
+            # Title-only posts don't need the model at all
+            if not (include_comments and comments):
+                trivial = self._trivial_summary(post, summarized_at)
+                if trivial is not None:
+                    return trivial
+
             # Prepare content for summarization
-            content_to_summarize = f"Title: {post['title']}\n"
-            
-            if post['content']:
-                content_to_summarize += f"Content: {post['content']}\n"
-            
+            content_to_summarize = self._build_content(post, include_comments, comments)
+
+            # Serve identical content from the persistent cache when possible.
+            # With comments, hash their sorted prefixes so the key doesn't
+            # depend on comment ordering between fetches.
             if include_comments and comments:
-                content_to_summarize += "\nTop Comments:\n"
-                for i, comment in enumerate(comments[:5], 1):
-                    content_to_summarize += f"{i}. {comment['body'][:200]}...\n"
-            
-            # Create summary prompt
-            prompt = f"""
-            Please provide a concise summary of this Reddit post. Include:
-            1. Main topic/subject
-            2. Key points discussed
-            3. Overall sentiment/tone
-            4. Any important details or conclusions
-            
-            Post content:
-            {content_to_summarize}
-            
-            Provide a summary in 2-3 sentences.
-            """
-            
-            system_prompt = "You are a helpful assistant that summarizes Reddit posts concisely and accurately."
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            response = self.model.generate_content(full_prompt)
-            summary = response.text.strip()
-            
-            # Add summary to post data
-            post_with_summary = post.copy()
-            post_with_summary['summary'] = summary
-            post_with_summary['summarized_at'] = self._get_current_timestamp()
-            
-            return post_with_summary
-            
+                key_material = self._build_content(post) + "\n".join(
+                    sorted(self._comment_prefixes(comments))
+                )
+            else:
+                key_material = content_to_summarize
+            cache_key = self._cache_key(key_material)
+            summary = self._cache_get(cache_key)
+
+            if summary is None:
+                # Second tier: reuse the summary of a near-duplicate post
+                tokens = self._tokenize(content_to_summarize)
+                summary = self._similar_cached_summary(tokens)
+
+            if summary is None:
+                summary = self._generate_post_summary(content_to_summarize)
+                self._cache_set(cache_key, summary, tokens)
+                if self._sem_index is not None:
+                    self._sem_index.append((tokens, summary))
+
+            return self._with_summary(post, summary, summarized_at)
+
         except Exception as e:
-            print(f"Error summarizing post {post['id']}: {e}")
+            logger.error("Error summarizing post %s: %s", post['id'], e)
             post_with_summary = post.copy()
             post_with_summary['summary'] = "Error: Could not generate summary"
             return post_with_summary
     
-    def summarize_multiple_posts(self, posts: List[Dict], include_comments: bool = False) -> List[Dict]:
+    async def _summarize_post_async(self, post: Dict, include_comments: bool = False,
+                                    comments: List[Dict] = None,
+                                    summarized_at: Optional[str] = None) -> Dict:
+        """Run the blocking summarize_post call on a worker thread"""
+        return await asyncio.to_thread(self.summarize_post, post, include_comments,
+                                       comments, summarized_at)
+
+    async def summarize_multiple_posts_async(self, posts: List[Dict], include_comments: bool = False,
+                                             concurrency: int = 8) -> List[Dict]:
         """
-        Summarize multiple Reddit posts
-        
+        Summarize multiple Reddit posts concurrently
+
+        The Gemini calls are pure network waits, so they are fanned out
+        with asyncio.gather; a semaphore bounds in-flight requests to stay
+        within rate limits.
+
         Args:
             posts: List of post dictionaries
             include_comments: Whether to include comments in summaries
-        
+            concurrency: Maximum number of in-flight Gemini calls
+
         Returns:
-            List of posts with summaries added
+            List of posts with summaries added, in input order
         """
+        sem = asyncio.Semaphore(concurrency)
+        summarized_at = self._get_current_timestamp()
+
+        async def bounded(post: Dict) -> Dict:
+            async with sem:
+                comments = [] if include_comments else None
+                return await self._summarize_post_async(post, include_comments,
+                                                        comments, summarized_at)
+
+        results = await asyncio.gather(*(bounded(post) for post in posts),
+                                       return_exceptions=True)
+
         summarized_posts = []
-        
-        for post in posts:
-            print(f"Summarizing post: {post['title'][:50]}...")
-            
-            comments = None
-            if include_comments:
-                # Note: You would need to fetch comments separately using RedditClient
-                # This is left as a placeholder for integration
-                comments = []
-            
-            summarized_post = self.summarize_post(post, include_comments, comments)
-            summarized_posts.append(summarized_post)
-        
+        for post, result in zip(posts, results):
+            if isinstance(result, BaseException):
+                logger.error("Error summarizing post %s: %s", post['id'], result)
+                post_with_summary = post.copy()
+                post_with_summary['summary'] = "Error: Could not generate summary"
+                summarized_posts.append(post_with_summary)
+            else:
+                summarized_posts.append(result)
         return summarized_posts
+
+    @staticmethod
+    def _approx_tokens(text: str) -> int:
+        """Cheap local token estimate (~4 chars per token), no RPC needed"""
+        return len(text) // 4
+
+    def _pack_chunks(self, pending: List[Tuple], chunk_size: int) -> List[List[Tuple]]:
+        """
+        Greedily pack pending posts into chunks for batched summarization
+
+        Flushes a chunk when it reaches `chunk_size` posts or when adding
+        the next post would exceed the context-window token budget.
+
+        Args:
+            pending: (index, content, cache_key, tokens) tuples
+            chunk_size: Maximum posts per chunk
+
+        Returns:
+            List of chunks
+        """
+        chunks = []
+        current = []
+        current_tokens = CHUNK_PROMPT_OVERHEAD
+        for item in pending:
+            item_tokens = self._approx_tokens(item[1])
+            if current and (len(current) >= chunk_size
+                            or current_tokens + item_tokens > CHUNK_TOKEN_BUDGET):
+                chunks.append(current)
+                current = []
+                current_tokens = CHUNK_PROMPT_OVERHEAD
+            current.append(item)
+            current_tokens += item_tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _summarize_chunk(self, contents: List[str]) -> List[str]:
+        """
+        Summarize several posts in a single Gemini call
+
+        Packs the posts into one numbered prompt and asks for a JSON array
+        of summaries, amortizing the per-call network and time-to-first-
+        token overhead across the chunk.
+
+        Args:
+            contents: Content blocks for the posts in the chunk
+
+        Returns:
+            One summary per content block, in order
+        """
+        count = len(contents)
+        numbered = "\n\n".join(f"{i}. {content}" for i, content in enumerate(contents, 1))
+        prompt = (
+            f"Summarize each of the following {count} Reddit posts in 2-3 sentences. "
+            f"Return a JSON array of exactly {count} strings, in order.\n\n{numbered}"
+        )
+
+        text = self._generate_text(
+            prompt, generation_config={"response_mime_type": "application/json"}
+        )
+        summaries = json.loads(text)
+        if not isinstance(summaries, list) or len(summaries) != count:
+            raise ValueError(f"Expected {count} summaries, got {len(summaries)}")
+        return [str(summary).strip() for summary in summaries]
+
+    def summarize_multiple_posts(self, posts: List[Dict], include_comments: bool = False,
+                                 chunk_size: int = 10) -> List[Dict]:
+        """
+        Summarize multiple Reddit posts
+
+        Posts not served by the caches are summarized in chunks of
+        `chunk_size` per Gemini call instead of one call per post. The
+        comment-aware path still summarizes per post, concurrently.
+
+        Args:
+            posts: List of post dictionaries
+            include_comments: Whether to include comments in summaries
+            chunk_size: Number of posts per batched Gemini call
+
+        Returns:
+            List of posts with summaries added
+        """
+        if include_comments:
+            return asyncio.run(self.summarize_multiple_posts_async(posts, include_comments))
+
+        results: List[Optional[Dict]] = [None] * len(posts)
+        pending = []
+        summarized_at = self._get_current_timestamp()
+
+        for idx, post in enumerate(posts):
+            trivial = self._trivial_summary(post, summarized_at)
+            if trivial is not None:
+                results[idx] = trivial
+                continue
+
+            content = self._build_content(post)
+            cache_key = self._cache_key(content)
+            summary = self._cache_get(cache_key)
+            tokens = None
+            if summary is None:
+                tokens = self._tokenize(content)
+                summary = self._similar_cached_summary(tokens)
+            if summary is not None:
+                results[idx] = self._with_summary(post, summary, summarized_at)
+            else:
+                pending.append((idx, content, cache_key, tokens))
+
+        for chunk in self._pack_chunks(pending, chunk_size):
+            try:
+                summaries = self._summarize_chunk([content for _, content, _, _ in chunk])
+            except Exception as e:
+                logger.error("Error summarizing chunk: %s", e)
+                # Fall back to one call per post for this chunk
+                for idx, _, _, _ in chunk:
+                    results[idx] = self.summarize_post(posts[idx], summarized_at=summarized_at)
+                continue
+
+            for (idx, _, cache_key, tokens), summary in zip(chunk, summaries):
+                self._cache_set(cache_key, summary, tokens)
+                if self._sem_index is not None:
+                    self._sem_index.append((tokens, summary))
+                results[idx] = self._with_summary(posts[idx], summary, summarized_at)
+
+        return results
     
-    def create_digest(self, posts: List[Dict]) -> str:
+    @staticmethod
+    def _render_post_blocks(posts: List[Dict]) -> str:
+        """Render the per-post blocks used in the digest body and its prompt"""
+        parts = ["Reddit Posts Summary:\n\n"]
+
+        for i, post in enumerate(posts, 1):
+            parts.append(f"{i}. **{post['title']}**\n")
+            parts.append(f"   Subreddit: r/{post['subreddit']}\n")
+            parts.append(f"   Score: {post['score']} | Comments: {post['num_comments']}\n")
+
+            if 'summary' in post:
+                parts.append(f"   Summary: {post['summary']}\n")
+
+            parts.append(f"   Link: {post['permalink']}\n\n")
+
+        return "".join(parts)
+
+    def create_digest(self, posts: List[Dict], out: Optional[IO[str]] = None) -> Optional[str]:
         """
         Create a digest summary of multiple posts
-        
+
+        Sections are written to the sink as they are produced — header
+        first, then the overall summary streamed chunk by chunk, then the
+        per-post blocks — so with a file sink the digest never has to be
+        held in memory as one string and disk I/O overlaps with generation.
+
         Args:
             posts: List of summarized posts
-        
+            out: Optional writable text stream to emit the digest into
+
+        Returns:
+            String containing the digest, or None when `out` is given
+        """
+        sink = out if out is not None else io.StringIO()
+        try:
+            if not posts:
+                sink.write("No posts to summarize.")
+                return None if out is not None else sink.getvalue()
+
+            # Prepare content for digest (also the model's source material)
+            top_posts = posts[:10]  # Limit to top 10 posts
+            digest_content = self._render_post_blocks(top_posts)
+
+            sink.write("# Reddit Posts Digest\n\n")
+            sink.write(f"**Generated on:** {self._get_current_timestamp()}\n\n")
+            sink.write("## Overall Summary\n")
+
+            # Create overall summary; skip the model when there is too
+            # little material for it to add anything
+            total_chars = sum(len(p['title']) + len(p.get('summary', '')) for p in top_posts)
+            if total_chars < TRIVIAL_DIGEST_CHARS:
+                sink.write("\n".join(
+                    f"- **{p['title']}**: {p['summary']}" if 'summary' in p
+                    else f"- **{p['title']}**"
+                    for p in top_posts
+                ))
+            else:
+                full_digest_prompt = self._DIGEST_PROMPT_TMPL.format(digest=digest_content)
+                self._stream_to(full_digest_prompt, sink)
+
+            sink.write("\n\n")
+            sink.write(f"## Individual Posts\n{digest_content}")
+
+            return None if out is not None else sink.getvalue()
+
+        except Exception as e:
+            logger.error("Error creating digest: %s", e)
+            if out is not None:
+                return None
+            return f"Error creating digest: {e}"
+
+    async def create_digest_async(self, posts: List[Dict]) -> str:
+        """
+        Create a digest, filling missing per-post summaries concurrently
+
+        Posts loaded without a 'summary' (e.g. fetched with --no-summarize)
+        are summarized in parallel with the overall-summary call instead of
+        being silently omitted, so wall time is the slowest single call
+        rather than their sum. The overall summary is generated from the
+        posts as given; the filled summaries appear in the per-post section
+        and in the trivial-digest listing.
+
+        Args:
+            posts: List of posts, summarized or not
+
         Returns:
             String containing the digest
         """
         try:
             if not posts:
                 return "No posts to summarize."
-            
-            # Prepare content for digest
-            digest_content = "Reddit Posts Summary:\n\n"
-            
-            for i, post in enumerate(posts[:10], 1):  # Limit to top 10 posts
-                digest_content += f"{i}. **{post['title']}**\n"
-                digest_content += f"   Subreddit: r/{post['subreddit']}\n"
-                digest_content += f"   Score: {post['score']} | Comments: {post['num_comments']}\n"
-                
-                if 'summary' in post:
-                    digest_content += f"   Summary: {post['summary']}\n"
-                
-                digest_content += f"   Link: {post['permalink']}\n\n"
-            
-            # Create overall summary
-            prompt = f"""
-            Based on these Reddit posts, provide an overall summary highlighting:
-            1. Main themes or topics discussed
-            2. Notable trends or patterns
-            3. Most engaging or controversial posts
-            4. Key insights or takeaways
-            
-            Posts data:
-            {digest_content}
-            
-            Provide a comprehensive but concise summary in 3-4 paragraphs.
-            """
-            
-            system_prompt = "You are a helpful assistant that creates insightful summaries of Reddit discussions."
-            full_digest_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            response = self.model.generate_content(full_digest_prompt)
-            overall_summary = response.text.strip()
-            
-            final_digest = f"# Reddit Posts Digest\n\n"
-            final_digest += f"**Generated on:** {self._get_current_timestamp()}\n\n"
-            final_digest += f"## Overall Summary\n{overall_summary}\n\n"
-            final_digest += f"## Individual Posts\n{digest_content}"
-            
-            return final_digest
-            
+
+            top_posts = posts[:10]  # Limit to top 10 posts
+            digest_content = self._render_post_blocks(top_posts)
+            summarized_at = self._get_current_timestamp()
+
+            total_chars = sum(len(p['title']) + len(p.get('summary', '')) for p in top_posts)
+            missing = [i for i, post in enumerate(top_posts) if 'summary' not in post]
+            fill_coros = [self._summarize_post_async(top_posts[i], summarized_at=summarized_at)
+                          for i in missing]
+
+            if total_chars < TRIVIAL_DIGEST_CHARS:
+                filled = await asyncio.gather(*fill_coros)
+                overall_summary = None
+            else:
+                prompt = self._DIGEST_PROMPT_TMPL.format(digest=digest_content)
+                overall_summary, *filled = await asyncio.gather(
+                    asyncio.to_thread(self._generate_text, prompt, True),
+                    *fill_coros
+                )
+                overall_summary = overall_summary.strip()
+
+            for idx, post in zip(missing, filled):
+                top_posts[idx] = post
+
+            if overall_summary is None:
+                overall_summary = "\n".join(
+                    f"- **{p['title']}**: {p['summary']}" if 'summary' in p
+                    else f"- **{p['title']}**"
+                    for p in top_posts
+                )
+
+            return "".join([
+                "# Reddit Posts Digest\n\n",
+                f"**Generated on:** {summarized_at}\n\n",
+                f"## Overall Summary\n{overall_summary}\n\n",
+                f"## Individual Posts\n{self._render_post_blocks(top_posts)}"
+            ])
+
         except Exception as e:
-            print(f"Error creating digest: {e}")
+            logger.error("Error creating digest: %s", e)
             return f"Error creating digest: {e}"
     
-    def _get_current_timestamp(self) -> str:
+    @staticmethod
+    def _get_current_timestamp() -> str:
         """Get current timestamp as string"""
-        from datetime import datetime
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
\ No newline at end of file